@@ -6,15 +6,27 @@ Automatically renames medical billing images based on OCR-extracted content.
 Generates meaningful filenames with provider, date, and document type information.
 """
 
+import hashlib
+import io
+import multiprocessing
 import os
+import pickle
+import queue
 import re
 import shutil
+import sqlite3
+import string
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_left
+from dataclasses import dataclass, field
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Set, Protocol, Callable
 
-import pytesseract
-from PIL import Image
+import ahocorasick
+from tesserocr import PyTessBaseAPI, PSM, RIL, iterate_level
 import cv2
 import numpy as np
 from loguru import logger
@@ -23,17 +35,278 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Date patterns with the (month, day, year) group indexes of each match
+DATE_PATTERNS = (
+    (r'\b(\d{1,2})[/-](\d{1,2})[/-](\d{4})\b', (0, 1, 2)),  # MM/DD/YYYY or MM-DD-YYYY
+    (r'\b(\d{4})[/-](\d{1,2})[/-](\d{1,2})\b', (1, 2, 0)),  # YYYY/MM/DD or YYYY-MM-DD
+    (r'\b(\d{1,2})[/-](\d{1,2})[/-](\d{2})\b', (0, 1, 2)),  # MM/DD/YY or MM-DD-YY
+    (r'\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(\d{1,2}),?\s+(\d{4})\b', (0, 1, 2)),  # Month DD, YYYY
+)
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+# Precompiled patterns shared by every renamer instance
+DATE_RES = tuple((re.compile(p, re.IGNORECASE), order) for p, order in DATE_PATTERNS)
+NAME_RES = (
+    re.compile(r'\b([A-Z][a-z]+\s+[A-Z][a-z]+)\b'),  # First Last
+    re.compile(r'\b([A-Z][a-z]+,\s*[A-Z][a-z]+)\b'),  # Last, First
+)
+FACILITY_RES = (
+    re.compile(r'\b([A-Z][A-Za-z\s]+(?:Hospital|Medical Center|Clinic|Health System|Healthcare))\b'),
+    re.compile(r'\b([A-Z][A-Za-z\s]{5,40})\s+(?:Hospital|Medical|Clinic|Health)\b'),
+)
+INSURANCE_RES = (
+    re.compile(r'\b([A-Z][a-z]+)\s+(Health|Insurance|Medical)\b', re.IGNORECASE),
+    re.compile(r'\b(Blue\s+Cross|Blue\s+Shield)\b', re.IGNORECASE),
+)
+
+
+class CharFilter(dict):
+    """str.translate() table that keeps characters accepted by ``keep``.
+    
+    Rejected characters are deleted, or mapped to ``replacement`` when given.
+    Entries are filled in on first sight, so any codepoint is handled.
+    """
+    
+    def __init__(self, keep: Callable[[str], bool], replacement: Optional[str] = None):
+        super().__init__()
+        self._keep = keep
+        self._replacement = replacement
+    
+    def __missing__(self, codepoint: int) -> Optional[object]:
+        value = codepoint if self._keep(chr(codepoint)) else self._replacement
+        self[codepoint] = value
+        return value
+
+
+# Character-cleaning tables (pure per-character filters, no regex engine)
+ALPHA_SPACE_TABLE = CharFilter(lambda c: c in string.ascii_letters or c.isspace())  # [^A-Za-z\s] -> ''
+ALPHA_SPACE_BLANK_TABLE = CharFilter(lambda c: c in string.ascii_letters or c.isspace(), ' ')  # [^A-Za-z\s] -> ' '
+ALPHA_TABLE = CharFilter(lambda c: c in string.ascii_letters)
+DIGIT_TABLE = CharFilter(lambda c: c in string.digits)
+
+# The assembled filename is almost always clean already, and regex scanning wins there
+UNSAFE_FILENAME_RE = re.compile(r'[^a-zA-Z0-9_-]')
+
+# Bump when preprocessing/OCR changes so cached text from older runs is not reused
+OCR_CACHE_VERSION = 4
+
+# Supported image extensions (lowercase)
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.tiff', '.tif', '.bmp', '.pdf'})
+
+# Bound on images buffered between pipeline stages
+PIPELINE_QUEUE_SIZE = 4
+
+# Laplacian-difference kernel for Immerkaer's fast noise estimate
+NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+# Structuring element for the speckle-removing morphological open
+DENOISE_KERNEL = np.ones((2, 2), np.uint8)
+
+# Coarse grid used to estimate background lighting
+ILLUMINATION_GRID = 32
+
+
+def estimate_noise(gray: np.ndarray) -> float:
+    """Estimate the noise standard deviation of a grayscale image (Immerkaer, 1996)."""
+    height, width = gray.shape
+    if height < 3 or width < 3:
+        return 0.0
+    response = cv2.filter2D(gray, cv2.CV_32F, NOISE_KERNEL)
+    return float(np.abs(response).sum()) * np.sqrt(0.5 * np.pi) / (6 * (width - 2) * (height - 2))
+
+
+def estimate_illumination_spread(gray: np.ndarray) -> float:
+    """Standard deviation of the page background brightness across the image.
+    
+    The image is averaged down to a coarse grid and dilated so each cell reflects
+    the paper rather than the ink; an evenly lit page gives a value near zero.
+    """
+    background = cv2.resize(gray, (ILLUMINATION_GRID, ILLUMINATION_GRID), interpolation=cv2.INTER_AREA)
+    background = cv2.dilate(background, np.ones((3, 3), np.uint8))
+    return float(background.std())
+
+
+def is_binary_image(gray: np.ndarray) -> bool:
+    """True if every pixel is already pure black or white."""
+    return cv2.countNonZero(cv2.inRange(gray, 1, 254)) == 0
+
+
+@dataclass
+class OcrJob:
+    """An image loaded for OCR: either cached text or a preprocessed image to recognize."""
+    image_path: Path
+    cache_key: Optional[str] = None
+    text: Optional[str] = None
+    processed_img: Optional[np.ndarray] = None
+
+
+@dataclass
+class TextIndex:
+    """Views of one OCR text computed once and shared by every extractor."""
+    text: str
+    text_lower: str
+    lines: List[str]
+    # category -> line index -> keywords of that category found on the line
+    keyword_lines: Dict[str, Dict[int, Set[str]]] = field(default_factory=dict)
+    
+    def line_keywords(self, category: str) -> Dict[int, Set[str]]:
+        """Map of line index -> keywords of this category found on that line."""
+        return self.keyword_lines.get(category, {})
+    
+    def keywords(self, category: str) -> Set[str]:
+        """All keywords of this category found anywhere in the text."""
+        found = set()
+        for line_hits in self.line_keywords(category).values():
+            found |= line_hits
+        return found
+
+
+class OCRBackend(Protocol):
+    """OCR engine that turns a preprocessed grayscale image into words with confidences."""
+    
+    def recognize(self, image: np.ndarray) -> Tuple[List[str], List[float]]:
+        """Return recognized words and their confidences (0-100), index-aligned."""
+        ...
+
+
+class TesseractBackend:
+    """Tesseract running in-process through tesserocr."""
+    
+    def __init__(self, tessdata_path: Optional[str] = None):
+        kwargs = {'lang': 'eng', 'psm': PSM.SINGLE_BLOCK}  # Uniform block of text
+        if tessdata_path:
+            kwargs['path'] = tessdata_path
+        self._api = PyTessBaseAPI(**kwargs)
+    
+    def recognize(self, image: np.ndarray) -> Tuple[List[str], List[float]]:
+        # Hand the 8-bit grayscale buffer straight to Tesseract (no PIL/PNG round trip)
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape
+        self._api.SetImageBytes(image.tobytes(), width, height, 1, width)
+        self._api.Recognize()
+        
+        # Read each word with its own confidence so the two lists cannot drift apart
+        words = []
+        confidences = []
+        for word_iter in iterate_level(self._api.GetIterator(), RIL.WORD):
+            try:
+                word = word_iter.GetUTF8Text(RIL.WORD).strip()
+            except RuntimeError:  # Raised for empty results (e.g. a blank page)
+                continue
+            if word:
+                words.append(word)
+                confidences.append(word_iter.Confidence(RIL.WORD))
+        return words, confidences
+
+
+class PaddleOCRBackend:
+    """PaddleOCR detector + recognizer; runs on the GPU when Paddle was built with CUDA.
+    
+    Requires the optional ``paddleocr`` (2.x) and ``paddlepaddle``/``paddlepaddle-gpu`` packages.
+    """
+    
+    def __init__(self):
+        try:
+            from paddleocr import PaddleOCR
+        except ImportError as e:
+            raise RuntimeError("OCR_BACKEND=paddle requires the 'paddleocr' and 'paddlepaddle' packages") from e
+        # use_gpu falls back to CPU when Paddle has no CUDA support; text lines
+        # from each image are recognized in batches of rec_batch_num
+        self._ocr = PaddleOCR(use_angle_cls=True, lang='en', use_gpu=True, rec_batch_num=32, show_log=False)
+    
+    def recognize(self, image: np.ndarray) -> Tuple[List[str], List[float]]:
+        result = self._ocr.ocr(cv2.cvtColor(image, cv2.COLOR_GRAY2BGR), cls=True)
+        words = []
+        confidences = []
+        for page in result or []:
+            for _box, (line_text, score) in page or []:
+                for word in line_text.split():
+                    words.append(word)
+                    confidences.append(score * 100)
+        return words, confidences
+
+
+class RapidOCRBackend:
+    """PP-OCR models run through ONNX Runtime (CPU SIMD kernels) via RapidOCR.
+    
+    Requires the optional ``rapidocr-onnxruntime`` package.
+    """
+    
+    def __init__(self):
+        try:
+            from rapidocr_onnxruntime import RapidOCR
+        except ImportError as e:
+            raise RuntimeError("OCR_BACKEND=rapidocr requires the 'rapidocr-onnxruntime' package") from e
+        self._ocr = RapidOCR()
+    
+    def recognize(self, image: np.ndarray) -> Tuple[List[str], List[float]]:
+        result, _elapse = self._ocr(image)
+        words = []
+        confidences = []
+        for _box, line_text, score in result or []:
+            for word in line_text.split():
+                words.append(word)
+                confidences.append(float(score) * 100)
+        return words, confidences
+
+
+OCR_BACKENDS = ('tesseract', 'paddle', 'rapidocr')
+
+
+def compile_keyword_re(keywords: List[str]) -> re.Pattern:
+    """Compile keywords into a single case-insensitive alternation (substring match)."""
+    # Longest first so overlapping keywords prefer the more specific match
+    ordered = sorted((kw for kw in keywords if kw), key=len, reverse=True)
+    return re.compile('|'.join(map(re.escape, ordered)) or r'(?!)', re.IGNORECASE)
+
 
 class MedicalImageRenamer:
     """Renames medical billing images based on OCR content analysis."""
     
     def __init__(self):
+        self._load_config()
+        self._build_engines()
+        
+        # Create directories
+        self.input_dir.mkdir(exist_ok=True)
+        self.output_dir.mkdir(exist_ok=True)
+        
+        logger.info(f"Initialized Medical Image Renamer")
+        logger.info(f"Input directory: {self.input_dir}")
+        logger.info(f"Output directory: {self.output_dir}")
+    
+    def __getstate__(self) -> dict:
+        """Pickle only the parsed configuration (the public attributes)."""
+        return {name: value for name, value in self.__dict__.items() if not name.startswith('_')}
+    
+    def __setstate__(self, state: dict):
+        """Restore configuration and rebuild the derived matchers, skipping env parsing."""
+        self.__dict__.update(state)
+        self._build_engines()
+    
+    def _load_config(self):
+        """Read settings and keyword lists from the environment."""
         self.input_dir = Path(os.getenv('INPUT_DIR', './input_images'))
         self.output_dir = Path(os.getenv('OUTPUT_DIR', './output_images'))
-        self.tesseract_cmd = os.getenv('TESSERACT_CMD', 'tesseract')
+        self.ocr_backend = os.getenv('OCR_BACKEND', 'tesseract').strip().lower()
+        if self.ocr_backend not in OCR_BACKENDS:
+            raise ValueError(f"Unknown OCR_BACKEND '{self.ocr_backend}' (expected one of: {', '.join(OCR_BACKENDS)})")
+        self.tessdata_path = os.getenv('TESSDATA_PATH')
         self.date_format = os.getenv('DATE_FORMAT', '%Y%m%d')
         self.confidence_threshold = int(os.getenv('OCR_CONFIDENCE_THRESHOLD', '30'))
         self.max_filename_length = int(os.getenv('MAX_FILENAME_LENGTH', '100'))
+        # One process per core for Tesseract; the neural backends are best fed by a single
+        # process (PaddleOCR holds the GPU, ONNX Runtime already spreads across cores)
+        default_workers = (os.cpu_count() or 1) if self.ocr_backend == 'tesseract' else 1
+        self.max_workers = int(os.getenv('MAX_WORKERS', str(default_workers)))
+        self.denoise_noise_threshold = float(os.getenv('DENOISE_NOISE_THRESHOLD', '2.0'))
+        self.illumination_std_threshold = float(os.getenv('ILLUMINATION_STD_THRESHOLD', '12.0'))
+        self.ocr_target_max_dim = int(os.getenv('OCR_TARGET_MAX_DIM', '2400'))
+        # Extracted text (patient names, amounts) is kept next to the renamed files it came from
+        self.ocr_cache_path = os.getenv('OCR_CACHE_PATH', str(self.output_dir / 'ocr_cache.db'))
         
         # Keywords for detection
         self.provider_keywords = [
@@ -56,179 +329,325 @@ class MedicalImageRenamer:
             word.strip().lower() 
             for word in os.getenv('AMOUNT_KEYWORDS', 'total,amount,balance,due,charge,bill,cost,payment').split(',')
         ]
+    
+    def _build_engines(self):
+        """Build matchers and per-process state derived from the configuration."""
+        # Single automaton over every keyword category for one-pass scans
+        self._keyword_automaton = self._build_keyword_automaton({
+            'patient': self.patient_keywords,
+            'hospital': self.hospital_keywords,
+            'amount': self.amount_keywords,
+            'document': self.document_types,
+            'provider': self.provider_keywords,
+        })
+        self._amount_kw_re = compile_keyword_re(self.amount_keywords)
         
-        # Set tesseract command path
-        if self.tesseract_cmd != 'tesseract':
-            pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
+        # Name capture patterns per patient keyword: "<keyword>: Name" and "Name <keyword>"
+        self._patient_name_res = {
+            keyword: (
+                re.compile(rf'{re.escape(keyword)}\s*:?\s*([A-Za-z\s,]+)', re.IGNORECASE),
+                re.compile(rf'([A-Za-z\s,]+)\s*{re.escape(keyword)}', re.IGNORECASE),
+            )
+            for keyword in self.patient_keywords
+        }
         
-        # Create directories
-        self.input_dir.mkdir(exist_ok=True)
-        self.output_dir.mkdir(exist_ok=True)
+        # Amount patterns; the keyword-anchored one follows AMOUNT_KEYWORDS
+        self._amount_res = (
+            re.compile(r'\$([0-9,]+\.?[0-9]*)', re.IGNORECASE),  # $123.45 or $1,234
+            re.compile(r'([0-9,]+\.?[0-9]*)\s*(?:USD|dollars?)', re.IGNORECASE),  # 123.45 USD
+            re.compile(rf'(?:{self._amount_kw_re.pattern})\s*:?\s*\$?([0-9,]+\.?[0-9]*)', re.IGNORECASE),
+        )
         
-        logger.info(f"Initialized Medical Image Renamer")
-        logger.info(f"Input directory: {self.input_dir}")
-        logger.info(f"Output directory: {self.output_dir}")
+        # OCR engine and cache, opened lazily so each worker process
+        # (and, for the cache, each pipeline thread) gets its own
+        self._ocr_engine: Optional[OCRBackend] = None
+        self._thread_local = threading.local()
+        self._ocr_cache_salt = (
+            f"{OCR_CACHE_VERSION}|{self.ocr_backend}|{self.confidence_threshold}|"
+            f"{self.denoise_noise_threshold}|{self.illumination_std_threshold}|"
+            f"{self.ocr_target_max_dim}|{self.tessdata_path}"
+        ).encode()
+        
+        # Lowercased names already in the output directory, loaded on first use
+        self._existing_names: Optional[Set[str]] = None
     
-    def preprocess_image(self, image_path: Path) -> np.ndarray:
+    @staticmethod
+    def _build_keyword_automaton(categories: Dict[str, List[str]]) -> ahocorasick.Automaton:
+        """Build an Aho-Corasick automaton mapping keyword -> categories it belongs to."""
+        keyword_categories: Dict[str, List[str]] = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                if keyword:
+                    keyword_categories.setdefault(keyword, []).append(category)
+        
+        automaton = ahocorasick.Automaton()
+        for keyword, owners in keyword_categories.items():
+            automaton.add_word(keyword, (keyword, tuple(owners)))
+        if keyword_categories:
+            automaton.make_automaton()
+        return automaton
+    
+    def index_text(self, text: str) -> TextIndex:
+        """Lowercase and split the text once and find every configured keyword in one pass."""
+        text_lower = text.lower()
+        index = TextIndex(text, text_lower, text.split('\n'))
+        if self._keyword_automaton.kind != ahocorasick.AHOCORASICK:
+            return index
+        
+        newline_offsets = [m.start() for m in re.finditer('\n', text_lower)]
+        
+        for end, (keyword, owners) in self._keyword_automaton.iter(text_lower):
+            line_index = bisect_left(newline_offsets, end)
+            for category in owners:
+                index.keyword_lines.setdefault(category, {}).setdefault(line_index, set()).add(keyword)
+        
+        return index
+    
+    def preprocess_image(self, image_path: Path, data: Optional[bytes] = None) -> np.ndarray:
         """Preprocess image to improve OCR accuracy."""
+        if data is None:
+            data = image_path.read_bytes()
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        
         try:
-            # Read image
-            img = cv2.imread(str(image_path))
+            # Decode image
+            img = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
             if img is None:
                 raise ValueError("Could not load image")
             
             # Convert to grayscale
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             
-            # Apply denoising
-            denoised = cv2.fastNlMeansDenoising(gray)
+            # Shrink oversized scans (e.g. phone photos); OCR time grows with pixel count
+            # and Tesseract gains nothing beyond ~300 DPI. Small images are left alone.
+            height, width = gray.shape
+            scale = self.ocr_target_max_dim / max(height, width)
+            if self.ocr_target_max_dim > 0 and scale < 1.0:  # 0 or less disables downscaling
+                logger.debug(f"Downscaling {image_path.name} by {scale:.2f} for OCR")
+                gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            
+            # Already black and white (e.g. a clean digital render): nothing to do
+            if is_binary_image(gray):
+                return gray
             
-            # Apply thresholding to get better text contrast
-            _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            # Remove speckle only when the image is measurably noisy: a small
+            # morphological open followed by a 3x3 median
+            if self._needs_denoise(gray):
+                denoised = cv2.medianBlur(cv2.morphologyEx(gray, cv2.MORPH_OPEN, DENOISE_KERNEL), 3)
+            else:
+                denoised = gray
+            
+            # Apply thresholding to get better text contrast; a single global
+            # threshold fails on unevenly lit photos, so switch to a local one there
+            if self._has_uneven_lighting(denoised):
+                thresh = cv2.adaptiveThreshold(denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                               cv2.THRESH_BINARY, 31, 10)
+            else:
+                _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
             
             return thresh
             
         except Exception as e:
             logger.warning(f"Image preprocessing failed for {image_path}: {e}")
             # Fall back to original image
-            img = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+            img = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
             return img
     
+    def _needs_denoise(self, gray: np.ndarray) -> bool:
+        """Cheap quality probe deciding whether denoising is worth its cost."""
+        noise = estimate_noise(gray)
+        logger.debug(f"Estimated noise level: {noise:.2f}")
+        return noise > self.denoise_noise_threshold
+    
+    def _has_uneven_lighting(self, gray: np.ndarray) -> bool:
+        """Whether background brightness varies enough to need local thresholding."""
+        spread = estimate_illumination_spread(gray)
+        logger.debug(f"Estimated illumination spread: {spread:.2f}")
+        return spread > self.illumination_std_threshold
+    
+    def _get_ocr_engine(self) -> OCRBackend:
+        """Return this process's OCR engine, initializing it on first use."""
+        if self._ocr_engine is None:
+            if self.ocr_backend == 'paddle':
+                self._ocr_engine = PaddleOCRBackend()
+            elif self.ocr_backend == 'rapidocr':
+                self._ocr_engine = RapidOCRBackend()
+            else:
+                self._ocr_engine = TesseractBackend(self.tessdata_path)
+        return self._ocr_engine
+    
+    def _get_ocr_cache(self) -> Optional[sqlite3.Connection]:
+        """Return this thread's OCR cache connection, or None if caching is disabled."""
+        connection = getattr(self._thread_local, 'ocr_cache', None)
+        if connection is None and self.ocr_cache_path:
+            connection = sqlite3.connect(self.ocr_cache_path, timeout=30)
+            # WAL lets worker processes read while another one writes; a cache can
+            # afford to lose its last few entries on power loss, so skip the per-commit fsync
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA temp_store=MEMORY')
+            connection.execute('CREATE TABLE IF NOT EXISTS ocr_cache (hash TEXT PRIMARY KEY, text TEXT NOT NULL)')
+            connection.commit()
+            self._thread_local.ocr_cache = connection
+        return connection
+    
+    def _ocr_cache_key(self, data: bytes) -> str:
+        """Hash of the file contents plus the settings that affect OCR output."""
+        digest = hashlib.blake2b(data, digest_size=16)
+        digest.update(self._ocr_cache_salt)
+        return digest.hexdigest()
+    
+    def _get_cached_text(self, cache_key: str) -> Optional[str]:
+        """Look up previously extracted text for this cache key."""
+        try:
+            cache = self._get_ocr_cache()
+            if cache is None:
+                return None
+            row = cache.execute('SELECT text FROM ocr_cache WHERE hash = ?', (cache_key,)).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.warning(f"OCR cache lookup failed: {e}")
+            return None
+    
+    def _store_cached_text(self, cache_key: str, text: str):
+        """Remember extracted text for this cache key."""
+        try:
+            cache = self._get_ocr_cache()
+            if cache is None:
+                return
+            cache.execute('INSERT OR REPLACE INTO ocr_cache (hash, text) VALUES (?, ?)', (cache_key, text))
+            cache.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"OCR cache update failed: {e}")
+    
     def extract_text(self, image_path: Path) -> str:
-        """Extract text from image using OCR."""
+        """Extract text from image using OCR, reusing cached results for identical files."""
+        return self.finish_ocr(self.prepare_ocr(image_path))
+    
+    def prepare_ocr(self, image_path: Path) -> OcrJob:
+        """Load an image and look up cached text, preprocessing it on a cache miss."""
+        job = OcrJob(image_path)
         try:
-            # Preprocess image
-            processed_img = self.preprocess_image(image_path)
-            
-            # Convert numpy array to PIL Image
-            pil_img = Image.fromarray(processed_img)
-            
-            # Perform OCR with confidence data
-            ocr_data = pytesseract.image_to_data(
-                pil_img, 
-                output_type=pytesseract.Output.DICT,
-                config='--psm 6'  # Uniform block of text
-            )
-            
-            # Filter text by confidence
-            filtered_text = []
-            for i in range(len(ocr_data['text'])):
-                confidence = int(ocr_data['conf'][i])
-                text = ocr_data['text'][i].strip()
-                if confidence > self.confidence_threshold and text:
-                    filtered_text.append(text)
+            data = image_path.read_bytes()
             
-            return ' '.join(filtered_text)
+            job.cache_key = self._ocr_cache_key(data)
+            job.text = self._get_cached_text(job.cache_key)
+            if job.text is not None:
+                logger.debug(f"OCR cache hit for {image_path.name}")
+                return job
             
+            # Preprocess image
+            job.processed_img = self.preprocess_image(image_path, data)
+            if job.processed_img is None:
+                raise ValueError("Could not load image")
+                
         except Exception as e:
             logger.error(f"OCR failed for {image_path}: {e}")
+            job.text = ""
+        
+        return job
+    
+    def finish_ocr(self, job: OcrJob) -> str:
+        """Return the job's text, running Tesseract and caching the result if needed."""
+        if job.text is not None:
+            return job.text
+        
+        try:
+            text = self._recognize(job.processed_img)
+        except Exception as e:
+            logger.error(f"OCR failed for {job.image_path}: {e}")
             return ""
+        
+        self._store_cached_text(job.cache_key, text)
+        return text
+    
+    def _recognize(self, processed_img: np.ndarray) -> str:
+        """Run the OCR engine on a preprocessed image and keep confident words."""
+        words, confidences = self._get_ocr_engine().recognize(processed_img)
+        
+        # Filter text by confidence in one vectorized pass
+        words_arr = np.asarray(words, dtype=object)
+        confidences_arr = np.asarray(confidences, dtype=np.float32)
+        mask = confidences_arr > self.confidence_threshold
+        
+        return ' '.join(words_arr[mask].tolist())
     
     def extract_date(self, text: str) -> Optional[str]:
         """Extract date from OCR text."""
-        # Common date patterns
-        date_patterns = [
-            r'\b(\d{1,2})[/-](\d{1,2})[/-](\d{4})\b',  # MM/DD/YYYY or MM-DD-YYYY
-            r'\b(\d{4})[/-](\d{1,2})[/-](\d{1,2})\b',  # YYYY/MM/DD or YYYY-MM-DD
-            r'\b(\d{1,2})[/-](\d{1,2})[/-](\d{2})\b',  # MM/DD/YY or MM-DD-YY
-            r'\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(\d{1,2}),?\s+(\d{4})\b',  # Month DD, YYYY
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for date_re, (month_index, day_index, year_index) in DATE_RES:
+            for match in date_re.finditer(text):
+                groups = match.groups()
+                
+                # Build the date straight from the captured groups
+                month = groups[month_index]
+                # IGNORECASE also matches non-ASCII case variants (e.g. 'ſep'); skip those
+                month = int(month) if month.isdigit() else MONTHS.get(month[:3].lower())
+                if month is None:
+                    continue
+                year = int(groups[year_index])
+                if year < 50:  # Handle 2-digit years
+                    year += 2000
+                elif year < 100:
+                    year += 1900
+                
                 try:
-                    groups = match.groups()
-                    if len(groups) == 3:
-                        if pattern == date_patterns[3]:  # Month name pattern
-                            month_name, day, year = groups
-                            date_obj = datetime.strptime(f"{month_name} {day} {year}", "%b %d %Y")
-                        else:
-                            # Try different date formats
-                            date_str = match.group()
-                            for fmt in ['%m/%d/%Y', '%Y/%m/%d', '%m-%d-%Y', '%Y-%m-%d', '%m/%d/%y', '%m-%d-%y']:
-                                try:
-                                    date_obj = datetime.strptime(date_str, fmt)
-                                    if date_obj.year < 2000 and date_obj.year > 50:  # Handle 2-digit years
-                                        date_obj = date_obj.replace(year=date_obj.year + 1900)
-                                    elif date_obj.year < 50:
-                                        date_obj = date_obj.replace(year=date_obj.year + 2000)
-                                    break
-                                except ValueError:
-                                    continue
-                            else:
-                                continue
-                        
-                        return date_obj.strftime(self.date_format)
-                        
+                    date_obj = datetime(year, month, int(groups[day_index]))
                 except ValueError:
                     continue
+                
+                return date_obj.strftime(self.date_format)
         
         return None
     
-    def extract_patient_name(self, text: str) -> Optional[str]:
+    def extract_patient_name(self, text: str, index: Optional[TextIndex] = None) -> Optional[str]:
         """Extract patient name from OCR text."""
-        lines = text.split('\n')
+        if index is None:
+            index = self.index_text(text)
+        line_hits = index.line_keywords('patient')
+        lines = index.lines
         
         # Look for lines containing patient keywords
-        for line in lines:
-            line_lower = line.lower()
+        for line_index in sorted(line_hits):
+            line = lines[line_index]
             for keyword in self.patient_keywords:
-                if keyword in line_lower:
-                    # Try to extract name after the keyword
-                    patterns = [
-                        rf'{keyword}\s*:?\s*([A-Za-z\s,]+)',
-                        rf'([A-Za-z\s,]+)\s*{keyword}',
-                    ]
-                    
-                    for pattern in patterns:
-                        match = re.search(pattern, line, re.IGNORECASE)
+                if keyword in line_hits[line_index]:
+                    # Try to extract name after (then before) the keyword
+                    for name_re in self._patient_name_res[keyword]:
+                        match = name_re.search(line)
                         if match:
                             name = match.group(1).strip()
                             # Clean up the name
-                            name = re.sub(r'[^A-Za-z\s]', '', name)
-                            name = re.sub(r'\s+', ' ', name).strip()
+                            name = ' '.join(name.translate(ALPHA_SPACE_TABLE).split())
                             if len(name) > 3 and len(name) < 50:  # Reasonable name length
                                 return name.title()
         
         # Look for capitalized names (common format)
-        name_patterns = [
-            r'\b([A-Z][a-z]+\s+[A-Z][a-z]+)\b',  # First Last
-            r'\b([A-Z][a-z]+,\s*[A-Z][a-z]+)\b',  # Last, First
-        ]
-        
-        for pattern in name_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
+        for name_re in NAME_RES:
+            for match in name_re.findall(text):
                 name = match.replace(',', '').strip()
                 if len(name) > 3 and len(name) < 50:
                     return name.title()
         
         return None
     
-    def extract_hospital_name(self, text: str) -> Optional[str]:
+    def extract_hospital_name(self, text: str, index: Optional[TextIndex] = None) -> Optional[str]:
         """Extract hospital/billing entity name from OCR text."""
-        lines = text.split('\n')
-        
-        # Look for lines containing hospital keywords
-        for line in lines:
-            line_lower = line.lower()
-            for keyword in self.hospital_keywords:
-                if keyword in line_lower:
-                    # Clean the line and extract entity name
-                    cleaned_line = re.sub(r'[^A-Za-z\s]', ' ', line)
-                    cleaned_line = re.sub(r'\s+', ' ', cleaned_line).strip()
-                    if len(cleaned_line) > 5 and len(cleaned_line) < 80:
-                        return cleaned_line.title()
+        if index is None:
+            index = self.index_text(text)
+        line_hits = index.line_keywords('hospital')
+        lines = index.lines
         
-        # Look for medical facility patterns
-        facility_patterns = [
-            r'\b([A-Z][A-Za-z\s]+(?:Hospital|Medical Center|Clinic|Health System|Healthcare))\b',
-            r'\b([A-Z][A-Za-z\s]{5,40})\s+(?:Hospital|Medical|Clinic|Health)\b',
-        ]
+        # Look for lines containing hospital keywords; which keyword matched
+        # does not matter, the whole line is the candidate
+        for line_index in sorted(line_hits):
+            # Clean the line and extract entity name
+            cleaned_line = ' '.join(lines[line_index].translate(ALPHA_SPACE_BLANK_TABLE).split())
+            if len(cleaned_line) > 5 and len(cleaned_line) < 80:
+                return cleaned_line.title()
         
-        for pattern in facility_patterns:
-            match = re.search(pattern, text)
+        # Look for medical facility patterns
+        for facility_re in FACILITY_RES:
+            match = facility_re.search(text)
             if match:
                 facility = match.group(1).strip()
                 if len(facility) > 5:
@@ -236,66 +655,63 @@ class MedicalImageRenamer:
         
         return None
     
-    def extract_bill_amount(self, text: str) -> Optional[str]:
+    def extract_bill_amount(self, text: str, index: Optional[TextIndex] = None) -> Optional[str]:
         """Extract bill amount from OCR text."""
-        # Look for dollar amounts
-        amount_patterns = [
-            r'\$([0-9,]+\.?[0-9]*)',  # $123.45 or $1,234
-            r'([0-9,]+\.?[0-9]*)\s*(?:USD|dollars?)',  # 123.45 USD
-            r'(?:total|amount|balance|due|charge|bill|cost|payment)\s*:?\s*\$?([0-9,]+\.?[0-9]*)',
-        ]
+        if index is None:
+            index = self.index_text(text)
+        # The keyword-anchored pattern can only match when an amount keyword is present
+        amount_res = self._amount_res if index.line_keywords('amount') else self._amount_res[:2]
         
-        amounts = []
-        for pattern in amount_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                # Clean the amount
-                amount = re.sub(r'[^0-9.,]', '', match)
+        # Look for dollar amounts, keeping the largest one found (likely the total);
+        # each candidate is parsed once and compared as it is found
+        largest = None
+        largest_value = 0.0
+        for amount_re in amount_res:
+            # Captured groups contain only digits, commas and periods
+            for amount in amount_re.findall(text):
                 if '.' in amount or ',' in amount:
                     try:
                         # Convert to float to validate
                         float_amount = float(amount.replace(',', ''))
-                        if 0 < float_amount < 999999:  # Reasonable medical bill range
-                            amounts.append(amount)
                     except ValueError:
                         continue
+                    if largest_value < float_amount < 999999:  # Reasonable medical bill range
+                        largest = amount
+                        largest_value = float_amount
         
-        if amounts:
-            # Return the largest amount found (likely the total)
-            largest = max(amounts, key=lambda x: float(x.replace(',', '')))
+        if largest is not None:
             return f"${largest}"
         
         return None
     
-    def extract_provider(self, text: str) -> Optional[str]:
+    def extract_provider(self, text: str, index: Optional[TextIndex] = None) -> Optional[str]:
         """Extract insurance provider from OCR text."""
-        text_lower = text.lower()
-        
+        if index is None:
+            index = self.index_text(text)
+        found = index.keywords('provider')
         for provider in self.provider_keywords:
-            if provider in text_lower:
+            if provider in found:
                 return provider.title()
         
         # Look for common insurance company patterns
-        insurance_patterns = [
-            r'\b([A-Z][a-z]+)\s+(Health|Insurance|Medical)\b',
-            r'\b(Blue\s+Cross|Blue\s+Shield)\b',
-        ]
-        
-        for pattern in insurance_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for insurance_re in INSURANCE_RES:
+            match = insurance_re.search(text)
             if match:
                 return match.group().title()
         
         return None
     
-    def extract_document_type(self, text: str) -> Optional[str]:
+    def extract_document_type(self, text: str, index: Optional[TextIndex] = None) -> Optional[str]:
         """Extract document type from OCR text."""
-        text_lower = text.lower()
-        
+        if index is None:
+            index = self.index_text(text)
+        found = index.keywords('document')
         for doc_type in self.document_types:
-            if doc_type in text_lower:
+            if doc_type in found:
                 return doc_type.upper()
         
+        text_lower = index.text_lower
+        
         # Look for additional patterns
         if 'explanation of benefits' in text_lower:
             return 'EOB'
@@ -306,15 +722,31 @@ class MedicalImageRenamer:
         
         return None
     
+    def _extract_all(self, text: str) -> Dict[str, Optional[str]]:
+        """Run every extractor against a single lowercase/line/keyword index of the text."""
+        index = self.index_text(text)
+        return {
+            'date': self.extract_date(text),
+            'patient': self.extract_patient_name(text, index),
+            'hospital': self.extract_hospital_name(text, index),
+            'amount': self.extract_bill_amount(text, index),
+            'provider': self.extract_provider(text, index),
+            'document': self.extract_document_type(text, index),
+        }
+    
     def generate_filename(self, image_path: Path, text: str) -> str:
-        """Generate new filename based on extracted information."""
-        # Extract all components
-        patient_name = self.extract_patient_name(text)
-        date_str = self.extract_date(text)
-        bill_amount = self.extract_bill_amount(text)
-        hospital_name = self.extract_hospital_name(text)
-        provider = self.extract_provider(text)
-        doc_type = self.extract_document_type(text)
+        """Generate new filename based on extracted information.
+        
+        Duplicates are not resolved here; see resolve_duplicate().
+        """
+        # Extract all components from one shared index of the text
+        components = self._extract_all(text)
+        patient_name = components['patient']
+        date_str = components['date']
+        bill_amount = components['amount']
+        hospital_name = components['hospital']
+        provider = components['provider']
+        doc_type = components['document']
         
         # Build filename components in order: Date_PatientName_Hospital_Amount_Provider_DocType
         filename_parts = []
@@ -328,8 +760,7 @@ class MedicalImageRenamer:
         # Add patient name
         if patient_name:
             # Clean patient name for filename
-            clean_name = re.sub(r'[^a-zA-Z\s]', '', patient_name)
-            clean_name = re.sub(r'\s+', '', clean_name)  # Remove spaces
+            clean_name = patient_name.translate(ALPHA_TABLE)  # Letters only, no spaces
             filename_parts.append(clean_name)
         else:
             filename_parts.append('UnknownPatient')
@@ -337,8 +768,7 @@ class MedicalImageRenamer:
         # Add hospital/billing entity
         if hospital_name:
             # Clean hospital name for filename
-            clean_hospital = re.sub(r'[^a-zA-Z\s]', '', hospital_name)
-            clean_hospital = re.sub(r'\s+', '', clean_hospital)  # Remove spaces
+            clean_hospital = hospital_name.translate(ALPHA_TABLE)  # Letters only, no spaces
             # Truncate if too long
             if len(clean_hospital) > 30:
                 clean_hospital = clean_hospital[:30]
@@ -349,7 +779,7 @@ class MedicalImageRenamer:
         # Add bill amount
         if bill_amount:
             # Clean amount for filename (remove $ and .)
-            clean_amount = re.sub(r'[^0-9]', '', bill_amount)
+            clean_amount = bill_amount.translate(DIGIT_TABLE)
             filename_parts.append(f"{clean_amount}USD")
         else:
             filename_parts.append('UnknownAmount')
@@ -366,7 +796,7 @@ class MedicalImageRenamer:
         base_filename = '_'.join(filename_parts)
         
         # Sanitize filename (remove any remaining special characters)
-        base_filename = re.sub(r'[^a-zA-Z0-9_-]', '', base_filename)
+        base_filename = UNSAFE_FILENAME_RE.sub('', base_filename)
         
         # Truncate if too long
         if len(base_filename) > self.max_filename_length - 10:  # Leave space for extension
@@ -374,40 +804,57 @@ class MedicalImageRenamer:
         
         # Add original extension
         extension = image_path.suffix.lower()
-        new_filename = f"{base_filename}{extension}"
+        return f"{base_filename}{extension}"
+    
+    def resolve_duplicate(self, filename: str) -> str:
+        """Return and reserve a filename that does not collide with existing output files."""
+        if self._existing_names is None:
+            self._existing_names = {name.lower() for name in os.listdir(self.output_dir)}
         
-        # Handle duplicates
+        base_filename, extension = os.path.splitext(filename)
+        new_filename = filename
         counter = 1
-        final_path = self.output_dir / new_filename
-        while final_path.exists():
-            name_without_ext = base_filename
-            new_filename = f"{name_without_ext}_{counter:02d}{extension}"
-            final_path = self.output_dir / new_filename
+        # Compare case-insensitively so case-insensitive filesystems can't overwrite
+        while new_filename.lower() in self._existing_names:
+            new_filename = f"{base_filename}_{counter:02d}{extension}"
             counter += 1
         
+        self._existing_names.add(new_filename.lower())
+        return new_filename
+    
+    def propose_filename(self, image_path: Path) -> str:
+        """OCR an image and propose its new filename (duplicates not yet resolved)."""
+        return self.filename_for_text(image_path, self.extract_text(image_path))
+    
+    def filename_for_text(self, image_path: Path, text: str) -> str:
+        """Propose a filename from extracted text, falling back when there is none."""
+        if not text:
+            logger.warning(f"No text extracted from {image_path.name}")
+            # Use fallback naming
+            timestamp = datetime.now().strftime(self.date_format)
+            return f"{timestamp}_Unknown_Document{image_path.suffix}"
+        
+        logger.debug(f"Extracted text (first 100 chars): {text[:100]}...")
+        return self.generate_filename(image_path, text)
+    
+    def save_renamed(self, image_path: Path, proposed_filename: str) -> str:
+        """Copy an image to the output directory under a unique version of its proposed name."""
+        new_filename = self.resolve_duplicate(proposed_filename)
+        self._copy_to_output(image_path, new_filename)
         return new_filename
     
+    def _copy_to_output(self, image_path: Path, new_filename: str):
+        """Copy an image into the output directory under its resolved name."""
+        output_path = self.output_dir / new_filename
+        shutil.copy2(image_path, output_path)
+        
+        logger.success(f"Renamed: {image_path.name} -> {new_filename}")
+    
     def process_image(self, image_path: Path) -> bool:
         """Process a single image file."""
         try:
             logger.info(f"Processing: {image_path.name}")
-            
-            # Extract text from image
-            text = self.extract_text(image_path)
-            if not text:
-                logger.warning(f"No text extracted from {image_path.name}")
-                # Use fallback naming
-                timestamp = datetime.now().strftime(self.date_format)
-                new_filename = f"{timestamp}_Unknown_Document{image_path.suffix}"
-            else:
-                logger.debug(f"Extracted text (first 100 chars): {text[:100]}...")
-                new_filename = self.generate_filename(image_path, text)
-            
-            # Copy file with new name
-            output_path = self.output_dir / new_filename
-            shutil.copy2(image_path, output_path)
-            
-            logger.success(f"Renamed: {image_path.name} -> {new_filename}")
+            self.save_renamed(image_path, self.propose_filename(image_path))
             return True
             
         except Exception as e:
@@ -416,14 +863,15 @@ class MedicalImageRenamer:
     
     def process_directory(self) -> Tuple[int, int]:
         """Process all images in the input directory."""
-        # Supported image extensions
-        image_extensions = {'.jpg', '.jpeg', '.png', '.tiff', '.tif', '.bmp', '.pdf'}
-        
-        # Find all image files
-        image_files = []
-        for ext in image_extensions:
-            image_files.extend(self.input_dir.glob(f"*{ext}"))
-            image_files.extend(self.input_dir.glob(f"*{ext.upper()}"))
+        # Find all image files in a single directory read
+        with os.scandir(self.input_dir) as entries:
+            image_files = [
+                Path(entry.path)
+                for entry in entries
+                if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS and entry.is_file()
+            ]
+        # scandir order is filesystem-dependent; sort so duplicate suffixes are assigned reproducibly
+        image_files.sort()
         
         if not image_files:
             logger.warning(f"No image files found in {self.input_dir}")
@@ -431,23 +879,153 @@ class MedicalImageRenamer:
         
         logger.info(f"Found {len(image_files)} image files to process")
         
-        # Process each image
+        workers = min(self.max_workers, len(image_files))
+        if workers > 1:
+            successful, failed = self._process_parallel(image_files, workers)
+        else:
+            successful, failed = self._process_pipelined(image_files)
+        
+        logger.info(f"Processing complete: {successful} successful, {failed} failed")
+        return successful, failed
+    
+    def _process_pipelined(self, image_files: List[Path]) -> Tuple[int, int]:
+        """Process images in this process, overlapping loading, OCR and copying.
+        
+        A reader thread loads and preprocesses the next images while this thread
+        runs OCR, and a writer thread copies finished files in the background.
+        """
+        prepared_queue: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        copy_queue: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        copy_counts = [0, 0]  # successful, failed
+        
+        def read_images():
+            try:
+                for image_path in image_files:
+                    logger.info(f"Processing: {image_path.name}")
+                    prepared_queue.put(self.prepare_ocr(image_path))
+            finally:
+                prepared_queue.put(None)
+        
+        def write_images():
+            for image_path, new_filename in iter(copy_queue.get, None):
+                try:
+                    self._copy_to_output(image_path, new_filename)
+                    copy_counts[0] += 1
+                except Exception as e:
+                    logger.error(f"Failed to process {image_path.name}: {e}")
+                    copy_counts[1] += 1
+        
+        reader = threading.Thread(target=read_images, name='image-reader', daemon=True)
+        writer = threading.Thread(target=write_images, name='image-writer', daemon=True)
+        reader.start()
+        writer.start()
+        
+        failed = 0
+        try:
+            for job in iter(prepared_queue.get, None):
+                try:
+                    text = self.finish_ocr(job)
+                    new_filename = self.resolve_duplicate(self.filename_for_text(job.image_path, text))
+                    copy_queue.put((job.image_path, new_filename))
+                except Exception as e:
+                    logger.error(f"Failed to process {job.image_path.name}: {e}")
+                    failed += 1
+        finally:
+            copy_queue.put(None)
+            writer.join()
+        
+        return copy_counts[0], failed + copy_counts[1]
+    
+    def _process_parallel(self, image_files: List[Path], workers: int) -> Tuple[int, int]:
+        """OCR images across worker processes; copy and dedupe results here."""
+        logger.info(f"Processing with {workers} worker processes")
+        chunksize = max(1, len(image_files) // (workers * 4))
+        
         successful = 0
         failed = 0
         
-        for image_path in image_files:
-            if self.process_image(image_path):
-                successful += 1
-            else:
-                failed += 1
+        # Workers receive this renamer's parsed configuration instead of re-reading the environment,
+        # and the parent's logger so their records reach its sinks under any start method
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self, _shareable_logger())) as executor:
+            # Results come back in input order, so duplicate counters stay deterministic
+            for image_path, proposed_filename in executor.map(_propose_one, image_files, chunksize=chunksize):
+                if proposed_filename is None:
+                    failed += 1
+                    continue
+                try:
+                    self.save_renamed(image_path, proposed_filename)
+                    successful += 1
+                except Exception as e:
+                    logger.error(f"Failed to process {image_path.name}: {e}")
+                    failed += 1
         
-        logger.info(f"Processing complete: {successful} successful, {failed} failed")
         return successful, failed
 
 
+class _SinkCheckPickler(pickle.Pickler):
+    """Dry-run pickler for the logger.
+    
+    Enqueued sinks carry multiprocessing queues and locks, which may only be pickled
+    while a process is being started, so they are stubbed out here.
+    """
+    
+    def reducer_override(self, obj):
+        if type(obj).__module__.startswith('multiprocessing.'):
+            return object, ()
+        return NotImplemented
+
+
+def _shareable_logger():
+    """The logger to hand to pool workers, or None if it cannot be sent to them.
+    
+    Forked workers inherit the logger as is. Spawned workers (the default on macOS
+    and Windows) need it pickled, which only works when every sink uses enqueue=True.
+    """
+    if multiprocessing.get_start_method() == 'fork':
+        return logger
+    try:
+        _SinkCheckPickler(io.BytesIO()).dump(logger)
+    except (TypeError, pickle.PicklingError):
+        logger.warning("Log sinks not added with enqueue=True cannot be shared; "
+                       "worker processes will log to stderr only")
+        return None
+    return logger
+
+
+# Per-process renamer used by pool workers
+_worker_renamer: Optional[MedicalImageRenamer] = None
+
+
+def _init_worker(renamer: MedicalImageRenamer, parent_logger):
+    """Pool initializer: keep this worker's copy of the parent's renamer and logger.
+    
+    Spawned workers (the default on macOS and Windows) start with loguru's default
+    stderr sink only, so the module logger is rebound to the parent's.
+    """
+    global _worker_renamer, logger
+    _worker_renamer = renamer
+    if parent_logger is not None:
+        logger = parent_logger
+
+
+def _propose_one(image_path: Path) -> Tuple[Path, Optional[str]]:
+    """Pool task: propose a filename for one image, or None on failure."""
+    try:
+        logger.info(f"Processing: {image_path.name}")
+        return image_path, _worker_renamer.propose_filename(image_path)
+    except Exception as e:
+        logger.error(f"Failed to process {image_path.name}: {e}")
+        return image_path, None
+
+
 def main():
     """Main entry point."""
-    logger.add("image_renamer.log", rotation="10 MB", retention="7 days")
+    # enqueue=True on every sink so the logger can be handed to pool workers and
+    # their records are funneled through one queue and written safely
+    logger.remove()
+    logger.add(sys.stderr, enqueue=True)
+    logger.add("image_renamer.log", rotation="10 MB", retention="7 days", enqueue=True)
     
     try:
         renamer = MedicalImageRenamer()